@@ -1,20 +1,50 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import IndexModel, ReadPreference, ASCENDING, DESCENDING
+from typing import List, Optional
 import os
 
 class MongoDB:
     client: Optional[AsyncIOMotorClient] = None
     database = None
+    read_database = None
 
 db = MongoDB()
 
+# Emissions (year, co2_per_capita) index, hinted by the top/worst performer queries
+CO2_PER_CAPITA_INDEX = [("year", ASCENDING), ("co2_per_capita", ASCENDING)]
+
+INDEXES = {
+    "emissions": [
+        IndexModel([("country", ASCENDING), ("year", ASCENDING)], unique=True, background=True),
+        IndexModel([("year", ASCENDING), ("co2_emissions", DESCENDING)], background=True),
+        IndexModel(CO2_PER_CAPITA_INDEX, background=True),
+    ],
+    "energy": [
+        IndexModel([("country", ASCENDING), ("year", ASCENDING)], unique=True, background=True),
+        IndexModel([("year", ASCENDING), ("renewable_percentage", DESCENDING)], background=True),
+    ],
+}
+
 async def connect_to_mongo():
     """Create database connection"""
     mongodb_url = os.getenv("MONGODB_URL", "mongodb://mongodb:27017")
     database_name = os.getenv("MONGODB_DATABASE", "sustainability_dashboard")
     
-    db.client = AsyncIOMotorClient(mongodb_url)
+    db.client = AsyncIOMotorClient(
+        mongodb_url,
+        maxPoolSize=int(os.getenv("MONGODB_MAX_POOL_SIZE", 50)),
+        minPoolSize=int(os.getenv("MONGODB_MIN_POOL_SIZE", 10)),
+        maxIdleTimeMS=60000,
+        serverSelectionTimeoutMS=3000,
+        retryReads=True,
+        compressors="zstd,zlib"
+    )
     db.database = db.client[database_name]
+    # Dashboard traffic is read-only; let replica sets serve it from secondaries.
+    # Writes and the read-after-write refreshes stay on the primary.
+    db.read_database = db.client.get_database(
+        database_name, read_preference=ReadPreference.SECONDARY_PREFERRED
+    )
     
     # Test connection
     try:
@@ -24,6 +54,64 @@ async def connect_to_mongo():
         print(f"Failed to connect to MongoDB: {e}")
         raise
 
+    await create_indexes()
+
+async def create_indexes():
+    """Create compound indexes backing the dashboard query paths"""
+    for collection_name, indexes in INDEXES.items():
+        collection = db.database[collection_name]
+        existing = await collection.index_information()
+        for index in indexes:
+            # Create one at a time so a unique index blocked by duplicate
+            # (country, year) documents from older seeds doesn't take the
+            # query indexes down with it.
+            name = index.document["name"]
+            if index.document.get("unique") and name in existing and not existing[name].get("unique"):
+                # A non-unique fallback from an earlier startup holds the same
+                # name and key; swap it for the unique index once it can build
+                if not await restore_unique_index(collection, index):
+                    continue
+            try:
+                await collection.create_indexes([index])
+            except Exception as e:
+                print(f"Failed to create index {name} on {collection_name}: {e}")
+                if index.document.get("unique"):
+                    await create_fallback_index(collection, index)
+    print("MongoDB indexes ensured")
+
+async def has_duplicate_keys(collection, keys: List[str]) -> bool:
+    """Check whether any two documents share the same values for the given fields"""
+    pipeline = [
+        {"$group": {"_id": {key: f"${key}" for key in keys}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1}
+    ]
+    return bool(await collection.aggregate(pipeline, allowDiskUse=True).to_list(1))
+
+async def restore_unique_index(collection, index: IndexModel) -> bool:
+    """Drop a non-unique fallback index if its keys are unique again, so the unique index can replace it"""
+    name = index.document["name"]
+    try:
+        if await has_duplicate_keys(collection, list(index.document["key"])):
+            print(f"Keeping non-unique {name} on {collection.name}: duplicate documents remain")
+            return False
+        await collection.drop_index(name)
+        print(f"Dropped non-unique {name} on {collection.name}; rebuilding it as unique")
+        return True
+    except Exception as e:
+        print(f"Failed to restore unique index {name} on {collection.name}: {e}")
+        return False
+
+async def create_fallback_index(collection, index: IndexModel):
+    """Build a non-unique copy of a unique index so (country, year) upserts still avoid collection scans"""
+    fallback = IndexModel(list(index.document["key"].items()), background=True)
+    try:
+        await collection.create_indexes([fallback])
+        print(f"Created non-unique {fallback.document['name']} on {collection.name}; "
+              f"it is rebuilt as unique on a later startup once duplicates are removed")
+    except Exception as e:
+        print(f"Failed to create fallback index {fallback.document['name']} on {collection.name}: {e}")
+
 async def close_mongo_connection():
     """Close database connection"""
     if db.client:
@@ -32,4 +120,8 @@ async def close_mongo_connection():
 
 async def get_database():
     """Get database instance"""
-    return db.database
\ No newline at end of file
+    return db.database
+
+async def get_read_database():
+    """Get database instance for read-only dashboard queries, preferring secondaries"""
+    return db.read_database
\ No newline at end of file
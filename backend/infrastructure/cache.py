@@ -0,0 +1,121 @@
+import redis.asyncio as redis
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from functools import wraps
+from typing import Any, Optional
+import hashlib
+import logging
+import orjson
+import os
+
+logger = logging.getLogger(__name__)
+
+class RedisCache:
+    """Async Redis cache for dashboard API responses"""
+
+    def __init__(self):
+        self.pool: Optional[redis.ConnectionPool] = None
+        self.client: Optional[redis.Redis] = None
+
+    async def connect(self):
+        """Create connection pool; caching is disabled if Redis is unreachable"""
+        redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+        self.pool = redis.ConnectionPool.from_url(redis_url, max_connections=20, decode_responses=True)
+        self.client = redis.Redis(connection_pool=self.pool)
+
+        try:
+            await self.client.ping()
+            logger.info(f"Connected to Redis at {redis_url}")
+        except Exception as e:
+            logger.warning(f"Redis unavailable, response caching disabled: {e}")
+            await self.disconnect()
+
+    async def disconnect(self):
+        """Close connection pool"""
+        if self.client:
+            await self.client.aclose()
+        if self.pool:
+            await self.pool.disconnect()
+        self.client = None
+        self.pool = None
+
+    async def get_raw(self, key: str) -> Optional[str]:
+        """Get a cached string as stored"""
+        if not self.client:
+            return None
+        try:
+            return await self.client.get(key)
+        except Exception as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+
+    async def set_raw(self, key: str, value: str, expire: int = 300):
+        """Store a string with a TTL in seconds"""
+        if not self.client:
+            return
+        try:
+            await self.client.set(key, value, ex=expire)
+        except Exception as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached JSON value"""
+        value = await self.get_raw(key)
+        return orjson.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, expire: int = 300):
+        """Store a JSON-serializable value with a TTL in seconds.
+
+        orjson encodes dicts, lists and datetimes natively; anything else
+        (Pydantic models, ObjectIds) goes through jsonable_encoder.
+        """
+        await self.set_raw(key, orjson.dumps(value, default=jsonable_encoder).decode(), expire)
+
+    async def delete_pattern(self, pattern: str) -> int:
+        """Delete all keys matching a glob pattern"""
+        if not self.client:
+            return 0
+        deleted = 0
+        try:
+            batch = []
+            async for key in self.client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    deleted += await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.client.unlink(*batch)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {pattern}: {e}")
+        return deleted
+
+cache = RedisCache()
+
+def cached(prefix: str, expire: int = 300):
+    """Cache an endpoint's serialized JSON response keyed on its query parameters.
+
+    Apply below the router decorator so FastAPI still sees the handler signature.
+    Hits are returned as the stored JSON body without re-validation.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            params = {name: value for name, value in kwargs.items() if name != "db"}
+            digest = hashlib.sha1(
+                orjson.dumps(jsonable_encoder(params), option=orjson.OPT_SORT_KEYS)
+            ).hexdigest()
+            key = f"dashboard:{prefix}:{digest}"
+
+            hit = await cache.get_raw(key)
+            if hit is not None:
+                return Response(content=hit, media_type="application/json")
+
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                await cache.set_raw(key, result.body.decode(), expire)
+            else:
+                await cache.set(key, result, expire)
+            return result
+        return wrapper
+    return decorator
@@ -1,12 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 from db import connect_to_mongo, close_mongo_connection
+from infrastructure.cache import cache
 from routers import dashboard
-from services.scheduler import start_scheduler, stop_scheduler
+from services.scheduler import start_scheduler, stop_scheduler, data_service
 from services.data_service import DataService
 
 load_dotenv()
@@ -15,18 +17,22 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    await cache.connect()
     
     start_scheduler()
     yield
     # Shutdown
     stop_scheduler()
+    await data_service.close()
+    await cache.disconnect()
     await close_mongo_connection()
 
 app = FastAPI(
     title="Sustainability Dashboard API",
     description="API for sustainability metrics and dashboard data",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -51,4 +57,5 @@ if __name__ == "__main__":
     import uvicorn
     host = os.getenv("BACKEND_HOST", "0.0.0.0")
     port = int(os.getenv("BACKEND_PORT", 8000))
-    uvicorn.run(app, host=host, port=port)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    uvicorn.run("main:app", host=host, port=port, workers=workers, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from db import get_database
+from db import get_read_database
+from infrastructure.cache import cached
+from services.stats_service import compute_dashboard_stats, get_available_values, DASHBOARD_STATS_ID
 from schemas.models import (
     DashboardStats, 
     ChartData, 
-    TimeSeriesData,
     EmissionRecord,
     EnergyRecord,
     CountryMetrics
@@ -14,139 +16,162 @@ from schemas.models import (
 
 router = APIRouter()
 
+# Chart palettes and the parameter-independent pipeline stages are built once
+# at import; handlers only prepend the stages that depend on request params.
+TIMESERIES_COLORS = [
+    "#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF",
+    "#FF9F40", "#FF6384", "#C9CBCF", "#4BC0C0", "#FF6384"
+]
+
+RENEWABLE_COLORS = [
+    "#4CAF50", "#8BC34A", "#CDDC39", "#FFEB3B", "#FFC107",
+    "#FF9800", "#FF5722", "#F44336", "#E91E63", "#9C27B0",
+    "#673AB7", "#3F51B5", "#2196F3", "#03A9F4", "#00BCD4"
+]
+
+# Bounds for the timeseries year range; labels and every dataset are sized
+# from it, so it must stay small. The upper bound is the current year,
+# checked per request so long-running workers roll over at New Year.
+TIMESERIES_MIN_YEAR = 1750
+TIMESERIES_MAX_SPAN = 100
+
+_TOP_EMITTERS_STAGES = [
+    {"$sort": {"co2_emissions": -1}},
+    {"$limit": 10},
+    {"$project": {"country": 1}}
+]
+
+_RENEWABLE_SORT_STAGE = {"$sort": {"renewable_percentage": -1}}
+_RENEWABLE_PROJECT_STAGE = {"$project": {"country": 1, "renewable_percentage": 1, "_id": 0}}
+
+_COMPARISON_STAGES = [
+    {"$match": {"records": 2}},  # Only countries with data for both years
+    {"$project": {
+        "country": "$_id",
+        "year1_value": 1,
+        "year2_value": 1,
+        "change": {"$subtract": ["$year2_value", "$year1_value"]},
+        "percent_change": {
+            "$multiply": [
+                {"$divide": [{"$subtract": ["$year2_value", "$year1_value"]}, "$year1_value"]},
+                100
+            ]
+        }
+    }},
+    {"$sort": {"year2_value": -1}}
+]
+
+def _build_co2_timeseries(series_docs: List[Dict[str, Any]], countries: List[str], start_year: int, end_year: int) -> Dict[str, Any]:
+    """Build the CO2 timeseries chart from the per-country (year, value) documents"""
+    # Dense timeline straight from the request; missing years plot as 0
+    labels = [str(year) for year in range(start_year, end_year + 1)]
+    points_by_order = {doc["order"]: doc["points"] for doc in series_docs}
+    
+    datasets = []
+    for i, country in enumerate(countries):
+        # Scatter each record into its year slot in a single pass; a record
+        # without a value plots as 0 like a missing year, and countries
+        # without any records in range get an all-zero dataset
+        data = [0] * len(labels)
+        for point in points_by_order.get(i, ()):
+            data[point["y"] - start_year] = point.get("v", 0)
+        datasets.append({
+            "label": country,
+            "data": data,
+            "borderColor": TIMESERIES_COLORS[i % len(TIMESERIES_COLORS)],
+            "backgroundColor": TIMESERIES_COLORS[i % len(TIMESERIES_COLORS)] + "20",
+            "fill": False
+        })
+    
+    return {
+        "type": "line",
+        "title": "CO2 Emissions Over Time",
+        "data": {"labels": labels, "datasets": datasets},
+        "last_updated": datetime.utcnow()
+    }
+
 @router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db=Depends(get_database)):
+@cached(prefix="stats", expire=300)
+async def get_dashboard_stats(db=Depends(get_read_database)):
     """Get overall dashboard statistics"""
     
     try:
-        emissions_collection = db["emissions"]
-        energy_collection = db["energy"]
-        
-        # Get total countries
-        countries = await emissions_collection.distinct("country")
-        total_countries = len(countries)
-
-        latest_year = 2021
-        
-        # Calculate total CO2 emissions for latest year
-        pipeline = [
-            {"$match": {"year": latest_year}},
-            {"$group": {"_id": None, "total": {"$sum": "$co2_emissions"}}}
-        ]
-        total_co2_result = await emissions_collection.aggregate(pipeline).to_list(1)
-        total_co2_emissions = total_co2_result[0]["total"] if total_co2_result else 0
-        
-        # Calculate average renewable percentage
-        energy_pipeline = [
-            {"$match": {"year": latest_year}},
-            {"$addFields": {
-                "renewable_percentage_num": {"$toDouble": "$renewable_percentage"}
-            }},
-            {"$group": {"_id": None, "avg": {"$avg": "$renewable_percentage_num"}}}
-        ]
-        avg_renewable_result = await energy_collection.aggregate(energy_pipeline).to_list(1)
-        avg_renewable_percentage = avg_renewable_result[0]["avg"] if avg_renewable_result else 0
-
-
-        # Get top and worst performers by CO2 per capita
-        top_performers = await emissions_collection.find(
-            {"year": latest_year, "co2_per_capita": {"$exists": True}},
-            {"country": 1, "co2_per_capita": 1, "_id": 0}
-        ).sort("co2_per_capita", 1).limit(5).to_list(5)
+        # Materialized by the data refresh; recompute only if it hasn't run yet
+        stats = await db["dashboard_stats"].find_one({"_id": DASHBOARD_STATS_ID}, {"_id": 0, "computed_at": 0})
+        if not stats:
+            stats = await compute_dashboard_stats(db)
         
-        worst_performers = await emissions_collection.find(
-            {"year": latest_year, "co2_per_capita": {"$exists": True}},
-            {"country": 1, "co2_per_capita": 1, "_id": 0}
-        ).sort("co2_per_capita", -1).limit(5).to_list(5)
-        
-        return DashboardStats(
-            total_countries=total_countries,
-            latest_year=latest_year,
-            total_co2_emissions=round(total_co2_emissions, 2),
-            avg_renewable_percentage=round(avg_renewable_percentage, 2),
-            top_performers=top_performers,
-            worst_performers=worst_performers,
-            last_updated=datetime.utcnow()
-        )
+        return DashboardStats(**stats)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
 
-@router.get("/dashboard/co2-timeseries", response_model=ChartData)
+@router.get("/dashboard/co2-timeseries", response_model=None, responses={200: {"model": ChartData}})
+@cached(prefix="co2-timeseries", expire=300)
 async def get_co2_timeseries(
     countries: Optional[List[str]] = Query(default=None),
-    start_year: Optional[int] = Query(default=2010),
-    end_year: Optional[int] = Query(default=2023),
-    db=Depends(get_database)
+    start_year: Optional[int] = Query(default=2010, ge=TIMESERIES_MIN_YEAR),
+    end_year: Optional[int] = Query(default=2023, ge=TIMESERIES_MIN_YEAR),
+    db=Depends(get_read_database)
 ):
     """Get CO2 emissions time series data"""
     
+    current_year = datetime.utcnow().year
+    if end_year > current_year:
+        raise HTTPException(status_code=400, detail=f"end_year must not be after {current_year}")
+    if start_year > end_year:
+        raise HTTPException(status_code=400, detail="start_year must not be after end_year")
+    if end_year - start_year >= TIMESERIES_MAX_SPAN:
+        raise HTTPException(status_code=400, detail=f"Year range is limited to {TIMESERIES_MAX_SPAN} years")
+    
     try:
         emissions_collection = db["emissions"]
         
         # If no countries specified, get top 10 emitters
         if not countries:
-            top_emitters = await emissions_collection.aggregate([
-                {"$match": {"year": end_year}},
-                {"$sort": {"co2_emissions": -1}},
-                {"$limit": 10},
-                {"$project": {"country": 1}}
-            ]).to_list(10)
+            top_emitters = await emissions_collection.aggregate(
+                [{"$match": {"year": end_year}}, *_TOP_EMITTERS_STAGES]
+            ).to_list(10)
             countries = [doc["country"] for doc in top_emitters]
         
+        countries = list(dict.fromkeys(countries))
+        
         # Build query
         query = {
             "country": {"$in": countries},
             "year": {"$gte": start_year, "$lte": end_year}
         }
         
-        # Get data
-        emissions_data = await emissions_collection.find(
-            query,
-            {"country": 1, "year": 1, "co2_emissions": 1, "_id": 0}
-        ).sort([("country", 1), ("year", 1)]).to_list(None)
-        
-        # Process data for chart
-        years = sorted(list(set(doc["year"] for doc in emissions_data)))
-        labels = [str(year) for year in years]
-        
-        datasets = []
-        colors = [
-            "#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF",
-            "#FF9F40", "#FF6384", "#C9CBCF", "#4BC0C0", "#FF6384"
+        # Group each country's rows into (year, value) pairs server-side, one
+        # document per country in request order. Pairs rather than two parallel
+        # $push arrays, which would misalign when a record lacks co2_emissions
+        pipeline = [
+            {"$match": query},
+            {"$group": {
+                "_id": "$country",
+                "points": {"$push": {"y": "$year", "v": "$co2_emissions"}}
+            }},
+            # $literal keeps user-supplied names starting with "$" from being read as field paths
+            {"$addFields": {"order": {"$indexOfArray": [{"$literal": countries}, "$_id"]}}},
+            {"$sort": {"order": 1}}
         ]
         
-        for i, country in enumerate(countries):
-            country_data = [doc for doc in emissions_data if doc["country"] == country]
-            data_points = []
-            
-            for year in years:
-                year_data = next((doc for doc in country_data if doc["year"] == year), None)
-                data_points.append(year_data["co2_emissions"] if year_data else 0)
-            
-            datasets.append({
-                "label": country,
-                "data": data_points,
-                "borderColor": colors[i % len(colors)],
-                "backgroundColor": colors[i % len(colors)] + "20",
-                "fill": False
-            })
+        # One document per country, so size the batch to return them in a single reply
+        series_docs = await emissions_collection.aggregate(
+            pipeline, batchSize=max(len(countries), 1)
+        ).to_list(len(countries))
         
-        return ChartData(
-            type="line",
-            title="CO2 Emissions Over Time",
-            data=TimeSeriesData(labels=labels, datasets=datasets),
-            last_updated=datetime.utcnow()
-        )
+        return ORJSONResponse(_build_co2_timeseries(series_docs, countries, start_year, end_year))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching CO2 timeseries: {str(e)}")
 
-@router.get("/dashboard/renewable-energy", response_model=ChartData)
+@router.get("/dashboard/renewable-energy", response_model=None, responses={200: {"model": ChartData}})
+@cached(prefix="renewable-energy", expire=300)
 async def get_renewable_energy_data(
     year: Optional[int] = Query(default=2023),
     limit: Optional[int] = Query(default=15),
-    db=Depends(get_database)
+    db=Depends(get_read_database)
 ):
     """Get renewable energy percentage by country"""
     
@@ -156,13 +181,9 @@ async def get_renewable_energy_data(
         # Get top countries by renewable percentage
         pipeline = [
             {"$match": {"year": year}},
-            {"$sort": {"renewable_percentage": -1}},
+            _RENEWABLE_SORT_STAGE,
             {"$limit": limit},
-            {"$project": {
-                "country": 1,
-                "renewable_percentage": 1,
-                "_id": 0
-            }}
+            _RENEWABLE_PROJECT_STAGE
         ]
         
         energy_data = await energy_collection.aggregate(pipeline).to_list(limit)
@@ -170,34 +191,29 @@ async def get_renewable_energy_data(
         countries = [doc["country"] for doc in energy_data]
         percentages = [doc["renewable_percentage"] for doc in energy_data]
         
-        colors = [
-            "#4CAF50", "#8BC34A", "#CDDC39", "#FFEB3B", "#FFC107",
-            "#FF9800", "#FF5722", "#F44336", "#E91E63", "#9C27B0",
-            "#673AB7", "#3F51B5", "#2196F3", "#03A9F4", "#00BCD4"
-        ]
-        
         datasets = [{
             "label": "Renewable Energy %",
             "data": percentages,
-            "backgroundColor": colors[:len(countries)],
+            "backgroundColor": RENEWABLE_COLORS[:len(countries)],
             "borderWidth": 1
         }]
         
-        return ChartData(
-            type="bar",
-            title=f"Renewable Energy Percentage by Country ({year})",
-            data=TimeSeriesData(labels=countries, datasets=datasets),
-            last_updated=datetime.utcnow()
-        )
+        return ORJSONResponse({
+            "type": "bar",
+            "title": f"Renewable Energy Percentage by Country ({year})",
+            "data": {"labels": countries, "datasets": datasets},
+            "last_updated": datetime.utcnow()
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching renewable energy data: {str(e)}")
 
 @router.get("/dashboard/emissions-comparison")
+@cached(prefix="emissions-comparison", expire=300)
 async def get_emissions_comparison(
     compare_years: List[int] = Query(default=[2020, 2023]),
     limit: Optional[int] = Query(default=10),
-    db=Depends(get_database)
+    db=Depends(get_read_database)
 ):
     """Get year-over-year emissions comparison"""
     
@@ -209,62 +225,16 @@ async def get_emissions_comparison(
         
         year1, year2 = compare_years
         
-        # Get data for both years
+        # Get data for both years in a single grouping pass
         pipeline = [
             {"$match": {"year": {"$in": [year1, year2]}}},
             {"$group": {
                 "_id": "$country",
-                "emissions": {
-                    "$push": {
-                        "year": "$year",
-                        "co2_emissions": "$co2_emissions"
-                    }
-                }
+                "year1_value": {"$sum": {"$cond": [{"$eq": ["$year", year1]}, "$co2_emissions", 0]}},
+                "year2_value": {"$sum": {"$cond": [{"$eq": ["$year", year2]}, "$co2_emissions", 0]}},
+                "records": {"$sum": 1}
             }},
-            {"$match": {"emissions": {"$size": 2}}},  # Only countries with data for both years
-            {"$project": {
-                "country": "$_id",
-                "year1_emissions": {
-                    "$arrayElemAt": [
-                        {
-                            "$filter": {
-                                "input": "$emissions",
-                                "cond": {"$eq": ["$$this.year", year1]}
-                            }
-                        }, 0
-                    ]
-                },
-                "year2_emissions": {
-                    "$arrayElemAt": [
-                        {
-                            "$filter": {
-                                "input": "$emissions",
-                                "cond": {"$eq": ["$$this.year", year2]}
-                            }
-                        }, 0
-                    ]
-                }
-            }},
-            {"$project": {
-                "country": 1,
-                "year1_value": "$year1_emissions.co2_emissions",
-                "year2_value": "$year2_emissions.co2_emissions",
-                "change": {
-                    "$subtract": ["$year2_emissions.co2_emissions", "$year1_emissions.co2_emissions"]
-                },
-                "percent_change": {
-                    "$multiply": [
-                        {
-                            "$divide": [
-                                {"$subtract": ["$year2_emissions.co2_emissions", "$year1_emissions.co2_emissions"]},
-                                "$year1_emissions.co2_emissions"
-                            ]
-                        },
-                        100
-                    ]
-                }
-            }},
-            {"$sort": {"year2_value": -1}},
+            *_COMPARISON_STAGES,
             {"$limit": limit}
         ]
         
@@ -282,25 +252,25 @@ async def get_emissions_comparison(
         raise HTTPException(status_code=500, detail=f"Error fetching emissions comparison: {str(e)}")
 
 @router.get("/countries")
-async def get_countries(db=Depends(get_database)):
+@cached(prefix="countries", expire=3600)
+async def get_countries(db=Depends(get_read_database)):
     """Get list of available countries"""
     
     try:
-        emissions_collection = db["emissions"]
-        countries = await emissions_collection.distinct("country")
-        return {"countries": sorted(countries)}
+        countries = await get_available_values(db, "country")
+        return {"countries": countries}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching countries: {str(e)}")
 
 @router.get("/years")
-async def get_available_years(db=Depends(get_database)):
+@cached(prefix="years", expire=3600)
+async def get_available_years(db=Depends(get_read_database)):
     """Get list of available years"""
     
     try:
-        emissions_collection = db["emissions"]
-        years = await emissions_collection.distinct("year")
-        return {"years": sorted(years)}
+        years = await get_available_values(db, "year")
+        return {"years": years}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching years: {str(e)}")
\ No newline at end of file
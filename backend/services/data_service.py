@@ -1,11 +1,14 @@
-import random
 import asyncio
 from datetime import datetime
 from typing import List, Dict, Any
 import logging
 
-from schemas.models import EmissionRecord, EnergyRecord
+import numpy as np
+from pymongo import UpdateOne
+
+from infrastructure.cache import cache
 from .external_data_service import ExternalDataService
+from .stats_service import refresh_dashboard_stats, refresh_available_values
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,7 @@ class DataService:
     
     def __init__(self):
         self.external_data_service = ExternalDataService()
+        self._rng = np.random.default_rng()
         self.countries = [
             "United States", "China", "India", "Russia", "Japan", "Germany", 
             "Iran", "South Korea", "Saudi Arabia", "Indonesia", "Canada", 
@@ -44,6 +48,10 @@ class DataService:
             "China": 28.8, "India": 25.2, "Russia": 19.1, "Australia": 21.2
         }
 
+    async def close(self):
+        """Release external API connections"""
+        await self.external_data_service.close()
+
     async def seed_historical_data(self, db):
         """Seed historical data using real data from external APIs"""
         try:
@@ -63,6 +71,7 @@ class DataService:
             
             # Use external data service to fetch and seed real data
             await self.external_data_service.seed_real_historical_data(db)
+            await self._refresh_derived_data(db)
             
         except Exception as e:
             logger.error(f"Error seeding historical data: {e}")
@@ -77,64 +86,111 @@ class DataService:
             emissions_collection = db["emissions"]
             energy_collection = db["energy"]
             
-            years = range(2010, 2024)  # 2010-2023
+            years = np.arange(2010, 2024)  # 2010-2023
+            now = datetime.utcnow()  # shared insertion time for the whole batch
+            shape = (len(years), len(self.countries))
+            year_offsets = (years - 2010)[:, None]
+            
+            # Records are laid out year-major to match the (year, country) arrays
+            record_years = np.repeat(years, len(self.countries)).tolist()
+            record_countries = self.countries * len(years)
             
             # Seed emissions data
-            for year in years:
-                for country in self.countries:
-                    base_emission = self.base_emissions.get(country, random.uniform(50, 1000))
-                    
-                    # Apply year-over-year growth/decline
-                    year_factor = 1 + (year - 2010) * random.uniform(-0.02, 0.03)  # ±2-3% per year
-                    co2_emissions = base_emission * year_factor * random.uniform(0.9, 1.1)
-                    
-                    population = random.randint(1000000, 1400000000)
-                    gdp = random.uniform(100, 25000)
-                    co2_per_capita = (co2_emissions * 1000000) / population
-                    
-                    record = {
-                        "country": country,
-                        "year": year,
-                        "co2_emissions": round(co2_emissions, 2),
-                        "population": population,
-                        "gdp": round(gdp, 2),
-                        "co2_per_capita": round(co2_per_capita, 2),
-                        "created_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        "data_source": "synthetic"
-                    }
-                    
-                    await emissions_collection.insert_one(record)
+            base_emissions = np.array([self.base_emissions.get(country, 0) for country in self.countries], dtype=np.float64)
+            missing = base_emissions == 0
+            base_emissions[missing] = self._rng.uniform(50, 1000, missing.sum())
+            
+            # Apply year-over-year growth/decline, ±2-3% per year
+            year_factor = 1 + year_offsets * self._rng.uniform(-0.02, 0.03, shape)
+            co2_emissions = base_emissions[None, :] * year_factor * self._rng.uniform(0.9, 1.1, shape)
+            
+            population = self._rng.integers(1_000_000, 1_400_000_001, shape)
+            gdp = self._rng.uniform(100, 25000, shape)
+            co2_per_capita = (co2_emissions * 1_000_000) / population
+            
+            emission_records = [
+                {
+                    "country": country,
+                    "year": year,
+                    "co2_emissions": co2,
+                    "population": pop,
+                    "gdp": gdp_value,
+                    "co2_per_capita": per_capita,
+                    "created_at": now,
+                    "updated_at": now,
+                    "data_source": "synthetic"
+                }
+                for country, year, co2, pop, gdp_value, per_capita in zip(
+                    record_countries,
+                    record_years,
+                    co2_emissions.round(2).ravel().tolist(),
+                    population.ravel().tolist(),
+                    gdp.round(2).ravel().tolist(),
+                    co2_per_capita.round(2).ravel().tolist()
+                )
+            ]
+            
+            await self._bulk_insert(emissions_collection, emission_records)
             
             # Seed energy data
-            for year in years:
-                for country in self.countries:
-                    base_renewable = self.base_renewable.get(country, random.uniform(5, 40))
-                    
-                    # Apply year-over-year growth for renewables
-                    year_factor = 1 + (year - 2010) * random.uniform(0.02, 0.08)  # 2-8% growth per year
-                    renewable_percentage = min(100, base_renewable * year_factor * random.uniform(0.9, 1.1))
-                    
-                    total_energy = random.uniform(50, 4000)
-                    renewable_energy = total_energy * (renewable_percentage / 100)
-                    fossil_fuel_energy = total_energy - renewable_energy
-                    
-                    record = {
-                        "country": country,
-                        "year": year,
-                        "renewable_percentage": round(renewable_percentage, 2),
-                        "total_energy_consumption": round(total_energy, 2),
-                        "renewable_energy": round(renewable_energy, 2),
-                        "fossil_fuel_energy": round(fossil_fuel_energy, 2),
-                        "created_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        "data_source": "synthetic"
-                    }
-                    
-                    await energy_collection.insert_one(record)
+            base_renewable = np.array([self.base_renewable.get(country, 0) for country in self.countries], dtype=np.float64)
+            missing = base_renewable == 0
+            base_renewable[missing] = self._rng.uniform(5, 40, missing.sum())
             
+            # Apply year-over-year growth for renewables, 2-8% per year
+            year_factor = 1 + year_offsets * self._rng.uniform(0.02, 0.08, shape)
+            renewable_percentage = np.minimum(100, base_renewable[None, :] * year_factor * self._rng.uniform(0.9, 1.1, shape))
+            
+            total_energy = self._rng.uniform(50, 4000, shape)
+            renewable_energy = total_energy * (renewable_percentage / 100)
+            fossil_fuel_energy = total_energy - renewable_energy
+            
+            energy_records = [
+                {
+                    "country": country,
+                    "year": year,
+                    "renewable_percentage": percentage,
+                    "total_energy_consumption": total,
+                    "renewable_energy": renewable,
+                    "fossil_fuel_energy": fossil,
+                    "created_at": now,
+                    "updated_at": now,
+                    "data_source": "synthetic"
+                }
+                for country, year, percentage, total, renewable, fossil in zip(
+                    record_countries,
+                    record_years,
+                    renewable_percentage.round(2).ravel().tolist(),
+                    total_energy.round(2).ravel().tolist(),
+                    renewable_energy.round(2).ravel().tolist(),
+                    fossil_fuel_energy.round(2).ravel().tolist()
+                )
+            ]
+            
+            await self._bulk_insert(energy_collection, energy_records)
+            
+            await self._refresh_derived_data(db)
             logger.info(f"Seeded synthetic data for {len(years)} years and {len(self.countries)} countries")
             
         except Exception as e:
             logger.error(f"Error seeding synthetic data: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _refresh_derived_data(self, db):
+        """Rebuild materialized read models and drop cached responses after a data write"""
+        await refresh_dashboard_stats(db)
+        await refresh_available_values(db)
+        await cache.delete_pattern("dashboard:*")
+
+    async def _bulk_insert(self, collection, records: List[Dict[str, Any]], chunk_size: int = 1000):
+        """Insert records in unordered bulk batches, leaving existing (country, year) documents untouched"""
+        for start in range(0, len(records), chunk_size):
+            ops = [
+                UpdateOne(
+                    {"country": record["country"], "year": record["year"]},
+                    {"$setOnInsert": record},
+                    upsert=True
+                )
+                for record in records[start:start + chunk_size]
+            ]
+            await collection.bulk_write(ops, ordered=False)
@@ -1,21 +1,38 @@
 import asyncio
 import aiohttp
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from aiolimiter import AsyncLimiter
 import logging
-import csv
 import io
+from contextlib import aclosing
+import orjson
+import os
+import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Tuple
+from pymongo import UpdateOne
 from schemas.models import EmissionRecord, EnergyRecord
 
 logger = logging.getLogger(__name__)
 
+# Total energy consumption assumed for countries without an estimate, in TWh
+DEFAULT_ENERGY_ESTIMATE_TWH = 50.0
+
 class ExternalDataService:
     """Service for fetching real sustainability data from external APIs"""
     
     def __init__(self):
         self.world_bank_base_url = "https://api.worldbank.org/v2"
-        self.owid_co2_url = "https://raw.githubusercontent.com/owid/co2-data/master/owid-co2-data.csv"
+        self.owid_co2_url = os.getenv(
+            "OWID_CO2_URL", "https://raw.githubusercontent.com/owid/co2-data/master/owid-co2-data.csv"
+        )
         self.session_timeout = aiohttp.ClientTimeout(total=60)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Years fetched in parallel when refreshing from the World Bank API,
+        # with requests capped at 5 per second
+        self.max_concurrent_years = 4
+        self._wb_limiter = AsyncLimiter(5, 1)
         
         # World Bank indicator codes
         self.indicators = {
@@ -38,8 +55,11 @@ class ExternalDataService:
             "Israel", "Norway", "Finland", "Denmark", "Sweden", "Switzerland", 
             "Austria", "Belgium", "Portugal", "Czech Republic", "Greece", "Ukraine"
         ]
+        self.target_countries_set = frozenset(self.target_countries)
         
-        # ISO3 to country name mapping for World Bank compatibility
+        # World Bank country id to name mapping. Despite the name the keys are
+        # the two-letter ids the API accepts and echoes back as country.id
+        # (its countryiso3code field holds the three-letter code instead)
         self.iso3_to_name = {
             "US": "United States", "CN": "China", "IN": "India", "RU": "Russia", 
             "JP": "Japan", "DE": "Germany", "IR": "Iran", "KR": "South Korea", 
@@ -55,79 +75,151 @@ class ExternalDataService:
             "AT": "Austria", "BE": "Belgium", "PT": "Portugal", "CZ": "Czech Republic", 
             "GR": "Greece", "UA": "Ukraine"
         }
+        
+        # Rough total energy consumption estimates in TWh based on country size
+        # and development level, also as a Series for vectorized lookups
+        self.energy_estimates = {
+            "US": 4000, "CN": 7500, "IN": 1200, "RU": 1100, "JP": 1000,
+            "DE": 600, "BR": 600, "CA": 650, "KR": 550, "GB": 350,
+            "IT": 320, "FR": 480, "AU": 260, "ES": 280, "MX": 300,
+            "ID": 250, "TR": 280, "SA": 350, "IR": 280, "TH": 200,
+            "ZA": 230, "PL": 170, "AR": 130, "EG": 180, "NL": 120,
+            "MY": 180, "PK": 120, "VN": 220, "BD": 80, "NG": 30,
+            "PH": 100, "IQ": 90, "VE": 80, "KZ": 100, "DZ": 70,
+            "CL": 80, "MA": 40, "PE": 55, "IL": 65, "NO": 140,
+            "FI": 85, "DK": 35, "SE": 140, "CH": 60, "AT": 75,
+            "BE": 85, "PT": 50, "CZ": 75, "GR": 50, "UA": 120
+        }
+        self._energy_estimate_series = pd.Series(self.energy_estimates, dtype="float64")
+        
+        # Default World Bank country path segment, joined once
+        self.world_bank_country_codes = ";".join(self.iso3_to_name)
 
-    async def fetch_owid_co2_data(self, target_years: List[int] = None) -> Dict[str, List[Dict]]:
-        """Fetch CO2 emissions data from Our World in Data CSV"""
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # OWID and World Bank data change weekly at most, so scheduled
+            # reruns are served from an on-disk response cache. Server
+            # Cache-Control headers are ignored on purpose: GitHub's raw
+            # host sends max-age=300, which would defeat the daily policy.
+            self._session = CachedSession(
+                cache=SQLiteBackend(
+                    os.getenv("HTTP_CACHE_PATH", "http_cache"),
+                    expire_after=timedelta(days=1)
+                ),
+                timeout=self.session_timeout,
+                connector=aiohttp.TCPConnector(
+                    limit=20,
+                    limit_per_host=8,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75
+                )
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def iter_owid_co2_data(self, target_years: List[int] = None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Stream Mongo-ready CO2 emissions records from the Our World in Data CSV, grouped by year per parsed chunk"""
         
         if target_years is None:
             target_years = list(range(2010, 2024))
+        target_years_set = set(target_years)
             
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                async with session.get(self.owid_co2_url) as response:
-                    if response.status == 200:
-                        csv_content = await response.text()
-                        
-                        # Parse CSV data
-                        csv_reader = csv.DictReader(io.StringIO(csv_content))
-                        
-                        # Filter and organize data by year
-                        data_by_year = {year: [] for year in target_years}
-                        
-                        total_rows = 0
-                        matching_rows = 0
-                        
-                        for row in csv_reader:
-                            total_rows += 1
-                            try:
-                                year = int(row.get('year', 0))
-                                country = row.get('country', '').strip()
-                                
-                                # Filter for target years and countries
-                                if year in target_years and country in self.target_countries:
-                                    matching_rows += 1
-                                    # Extract relevant fields
-                                    co2_total = row.get('co2')  # Million tonnes
-                                    co2_per_capita = row.get('co2_per_capita')  # Tonnes per person
-                                    population = row.get('population')
-                                    gdp = row.get('gdp')
-                                    
-                                    # Create record if we have essential data
-                                    if co2_total or co2_per_capita:
-                                        record = {
-                                            'country': country,
-                                            'year': year,
-                                            'co2_total': float(co2_total) if co2_total else None,
-                                            'co2_per_capita': float(co2_per_capita) if co2_per_capita else None,
-                                            'population': int(float(population)) if population else None,
-                                            'gdp': float(gdp) if gdp else None
-                                        }
-                                        data_by_year[year].append(record)
-                                        
-                            except (ValueError, TypeError) as e:
-                                # Skip malformed rows
-                                continue
-                        
-                        years_with_data = len([y for y in data_by_year.values() if y])
-                        total_records = sum(len(records) for records in data_by_year.values())
-                        
-                        logger.info(f"Processed {total_rows} total rows, {matching_rows} matching rows")
-                        logger.info(f"Fetched OWID CO2 data: {years_with_data} years with data, {total_records} total records")
-                        
-                        # Debug: Show sample data
-                        for year in [2020, 2023]:
-                            if year in data_by_year and data_by_year[year]:
-                                logger.info(f"Year {year}: {len(data_by_year[year])} records, sample: {data_by_year[year][0]['country'] if data_by_year[year] else 'None'}")
-                        
-                        return data_by_year
-                        
-                    else:
-                        logger.error(f"OWID API error: {response.status}")
-                        return {}
-                        
+            session = await self._get_session()
+            async with session.get(self.owid_co2_url, headers={"Accept-Encoding": "gzip"}) as response:
+                if response.status != 200:
+                    logger.error(f"OWID API error: {response.status}")
+                    return
+                
+                # The cached session holds the whole (decompressed) body in
+                # memory to store it, so read it as bytes in one go; it is
+                # never materialized as a str
+                csv_buffer = io.BytesIO(await response.read())
+                    
         except Exception as e:
             logger.error(f"Error fetching OWID CO2 data: {e}")
-            return {}
+            return
+        
+        total_rows = 0
+        matching_rows = 0
+        total_records = 0
+        next_chunk = None
+        
+        try:
+            reader = pd.read_csv(
+                csv_buffer,
+                usecols=["country", "year", "co2", "co2_per_capita", "population", "gdp"],
+                dtype={"co2": "float64", "co2_per_capita": "float64", "population": "float64", "gdp": "float64"},
+                # The file is ~50k rows; small chunks let the prefetch below
+                # overlap parsing with the caller's writes
+                chunksize=10_000
+            )
+            
+            # Parsing is CPU-bound, so it runs in a worker thread; the next chunk
+            # is parsed while the caller writes the records from the current one
+            next_chunk = asyncio.create_task(asyncio.to_thread(self._read_owid_chunk, reader, target_years_set))
+            while (parsed := await next_chunk) is not None:
+                next_chunk = asyncio.create_task(asyncio.to_thread(self._read_owid_chunk, reader, target_years_set))
+                
+                rows_read, rows_matched, records_by_year = parsed
+                total_rows += rows_read
+                matching_rows += rows_matched
+                
+                for year, records in records_by_year.items():
+                    total_records += len(records)
+                    yield year, records
+            next_chunk = None
+                    
+        except Exception as e:
+            logger.error(f"Error parsing OWID CO2 data: {e}")
+            
+        finally:
+            if next_chunk is not None:
+                next_chunk.cancel()
+        
+        logger.info(f"Processed {total_rows} total rows, {matching_rows} matching rows")
+        logger.info(f"Fetched OWID CO2 data: {total_records} total records")
+
+    def _read_owid_chunk(self, reader, target_years: Set[int]) -> Optional[Tuple[int, int, Dict[int, List[Dict]]]]:
+        """Parse the next OWID CSV chunk into per-year records for the target countries"""
+        df = next(reader, None)
+        if df is None:
+            return None
+        rows_read = len(df)
+        
+        # Filter for target years first: the numeric check is cheap and drops
+        # most rows before any string work on the country column
+        df = df.loc[df["year"].isin(target_years)]
+        country = df["country"].str.strip()
+        df = df.loc[country.isin(self.target_countries_set)].assign(country=country)
+        rows_matched = len(df)
+        
+        # Treat zeros as missing, then derive whichever of total and
+        # per capita emissions is missing from the other
+        population = df["population"].where(df["population"] > 0)
+        co2_total = df["co2"].where(df["co2"] != 0)  # Million tonnes
+        co2_per_capita = df["co2_per_capita"].where(df["co2_per_capita"] != 0)  # Tonnes per person
+        co2_per_capita = co2_per_capita.fillna(co2_total * 1_000_000 / population)
+        co2_total = co2_total.fillna(co2_per_capita * population / 1_000_000)
+        
+        # Keep rows with essential data, rounded and zero-filled in bulk
+        df = pd.DataFrame({
+            "country": df["country"],
+            "year": df["year"],
+            "co2_emissions": co2_total.fillna(0.0).round(2),
+            "population": population.fillna(0).astype("int64"),
+            "gdp": df["gdp"].fillna(0.0).round(2),
+            "co2_per_capita": co2_per_capita.fillna(0.0).round(2)
+        }).loc[co2_total.notna() | co2_per_capita.notna()]
+        
+        records_by_year = {int(year): group.to_dict("records") for year, group in df.groupby("year")}
+        return rows_read, rows_matched, records_by_year
 
     async def fetch_world_bank_data(self, indicator: str, countries: List[str] = None, 
                                   start_year: int = 2010, end_year: int = 2023) -> List[Dict]:
@@ -135,9 +227,9 @@ class ExternalDataService:
         
         if countries is None:
             # Use ISO3 codes for World Bank API
-            countries = list(self.iso3_to_name.keys())
-            
-        country_codes = ";".join(countries)
+            country_codes = self.world_bank_country_codes
+        else:
+            country_codes = ";".join(countries)
         date_range = f"{start_year}:{end_year}"
         
         url = f"{self.world_bank_base_url}/country/{country_codes}/indicator/{indicator}"
@@ -148,18 +240,19 @@ class ExternalDataService:
         }
         
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # World Bank API returns [metadata, data]
-                        if isinstance(data, list) and len(data) > 1:
-                            return data[1] or []
-                        return []
-                    else:
-                        logger.error(f"World Bank API error {response.status} for indicator {indicator}")
-                        return []
-                        
+            session = await self._get_session()
+            # Token bucket keeps concurrent year/indicator fetches polite to the API
+            async with self._wb_limiter, session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    # World Bank API returns [metadata, data]
+                    if isinstance(data, list) and len(data) > 1:
+                        return data[1] or []
+                    return []
+                else:
+                    logger.error(f"World Bank API error {response.status} for indicator {indicator}")
+                    return []
+                    
         except Exception as e:
             logger.error(f"Error fetching World Bank data for {indicator}: {e}")
             return []
@@ -167,19 +260,42 @@ class ExternalDataService:
     async def fetch_comprehensive_country_data(self, year: int) -> Dict[str, Dict]:
         """Fetch comprehensive data for all indicators for a specific year"""
         
-        tasks = []
-        for indicator_name, indicator_code in self.indicators.items():
-            task = self.fetch_world_bank_data(indicator_code, start_year=year, end_year=year)
-            tasks.append((indicator_name, task))
+        coros = [
+            self.fetch_world_bank_data(indicator_code, start_year=year, end_year=year)
+            for indicator_code in self.indicators.values()
+        ]
         
         # Execute all API calls concurrently
+        data_list = await asyncio.gather(*coros, return_exceptions=True)
+        
         results = {}
-        for indicator_name, task in tasks:
-            data = await task
-            results[indicator_name] = {item['countryiso3code']: item for item in data if item.get('value') is not None}
+        for indicator_name, data in zip(self.indicators.keys(), data_list):
+            if isinstance(data, Exception):
+                logger.error(f"Error fetching {indicator_name} for {year}: {data}")
+                data = []
+            # Keyed by the two-letter id the API echoes back, matching iso3_to_name
+            results[indicator_name] = {item['country']['id']: item for item in data if item.get('value') is not None}
         
         return results
 
+    async def _gather_years(self, target_years: List[int], process_year):
+        """Run process_year for every target year, at most max_concurrent_years at a time"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_years)
+        
+        async def bounded(year: int):
+            async with semaphore:
+                await process_year(year)
+        
+        tasks = [asyncio.create_task(bounded(year)) for year in target_years]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # If one year fails, stop the others rather than leave them writing unobserved
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
     async def update_emissions_with_real_data(self, db, target_years: List[int] = None):
         """Update emissions data with real World Bank data"""
         
@@ -189,25 +305,31 @@ class ExternalDataService:
         try:
             emissions_collection = db["emissions"]
             
-            for year in target_years:
+            async def process_year(year: int):
                 logger.info(f"Fetching real emissions data for {year}")
+                now = datetime.utcnow()
                 
                 # Fetch data for the year
                 year_data = await self.fetch_comprehensive_country_data(year)
                 
                 records_to_upsert = []
                 
-                # Process each country
-                for country_code in self.target_countries:
+                # Local lookups for the per-country loop
+                iso3_to_name = self.iso3_to_name
+                per_capita_data = year_data.get("co2_emissions_per_capita", {})
+                total_kt_data = year_data.get("co2_emissions_total", {})
+                population_data = year_data.get("population", {})
+                gdp_data = year_data.get("gdp_per_capita", {})
+                
+                # Process each requested World Bank country
+                for country_code, country_name in iso3_to_name.items():
                     try:
-                        # Get country name mapping
-                        country_name = self.get_country_name(country_code)
                         
                         # Extract data for this country
-                        co2_per_capita = year_data.get("co2_emissions_per_capita", {}).get(country_code, {}).get("value")
-                        co2_total_kt = year_data.get("co2_emissions_total", {}).get(country_code, {}).get("value")
-                        population = year_data.get("population", {}).get(country_code, {}).get("value")
-                        gdp_per_capita = year_data.get("gdp_per_capita", {}).get(country_code, {}).get("value")
+                        co2_per_capita = per_capita_data.get(country_code, {}).get("value")
+                        co2_total_kt = total_kt_data.get(country_code, {}).get("value")
+                        population = population_data.get(country_code, {}).get("value")
+                        gdp_per_capita = gdp_data.get(country_code, {}).get("value")
                         
                         # Skip if no emissions data
                         if co2_per_capita is None and co2_total_kt is None:
@@ -225,18 +347,16 @@ class ExternalDataService:
                         if co2_per_capita is None and population is not None:
                             co2_per_capita = (co2_emissions_mt * 1000000) / population
                         
-                        record = EmissionRecord(
-                            country=country_name,
-                            year=year,
-                            co2_emissions=round(co2_emissions_mt, 2),
-                            population=int(population) if population else 0,
-                            gdp=round(gdp_per_capita, 2) if gdp_per_capita else 0.0,
-                            co2_per_capita=round(co2_per_capita, 2) if co2_per_capita else 0.0,
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow()
-                        )
-                        
-                        records_to_upsert.append(record.model_dump(exclude={"id"}))
+                        records_to_upsert.append({
+                            "country": country_name,
+                            "year": year,
+                            "co2_emissions": round(co2_emissions_mt, 2),
+                            "population": int(population) if population else 0,
+                            "gdp": round(gdp_per_capita, 2) if gdp_per_capita else 0.0,
+                            "co2_per_capita": round(co2_per_capita, 2) if co2_per_capita else 0.0,
+                            "created_at": now,
+                            "updated_at": now
+                        })
                         
                     except Exception as e:
                         logger.warning(f"Error processing {country_code} for {year}: {e}")
@@ -244,19 +364,14 @@ class ExternalDataService:
                 
                 # Batch upsert records
                 if records_to_upsert:
-                    for record in records_to_upsert:
-                        await emissions_collection.update_one(
-                            {"country": record["country"], "year": record["year"]},
-                            {"$set": record},
-                            upsert=True
-                        )
+                    EmissionRecord.model_validate(records_to_upsert[0])
+                    await self._bulk_upsert(emissions_collection, records_to_upsert)
                     
                     logger.info(f"Updated {len(records_to_upsert)} real emission records for {year}")
                 else:
                     logger.warning(f"No emission data found for {year}")
-                    
-                # Add delay between years to be respectful to the API
-                await asyncio.sleep(1)
+            
+            await self._gather_years(target_years, process_year)
                 
         except Exception as e:
             logger.error(f"Error updating emissions with real data: {e}")
@@ -271,8 +386,9 @@ class ExternalDataService:
         try:
             energy_collection = db["energy"]
             
-            for year in target_years:
+            async def process_year(year: int):
                 logger.info(f"Fetching real energy data for {year}")
+                now = datetime.utcnow()
                 
                 # Fetch renewable energy data
                 renewable_data = await self.fetch_world_bank_data(
@@ -281,70 +397,60 @@ class ExternalDataService:
                     end_year=year
                 )
                 
-                records_to_upsert = []
+                df = pd.DataFrame(renewable_data, columns=["country", "value"])
+                df = df.loc[df["value"].notna()]
+                # Two-letter id, the key of iso3_to_name and the energy estimates
+                country_code = df["country"].str.get("id")
+                renewable_percentage = df["value"].astype("float64")
                 
-                for item in renewable_data:
-                    if item.get('value') is None:
-                        continue
-                        
-                    country_code = item.get('countryiso3code')
-                    country_name = self.iso3_to_name.get(country_code, country_code)
-                    renewable_percentage = item.get('value')
-                    
-                    # Generate realistic energy consumption data based on country size
-                    # This is estimated since World Bank doesn't have total energy consumption in TWh
-                    total_energy = self.estimate_total_energy_consumption(country_code)
-                    renewable_energy = total_energy * (renewable_percentage / 100)
-                    fossil_fuel_energy = total_energy - renewable_energy
-                    
-                    record = EnergyRecord(
-                        country=country_name,
-                        year=year,
-                        renewable_percentage=round(renewable_percentage, 2),
-                        total_energy_consumption=round(total_energy, 2),
-                        renewable_energy=round(renewable_energy, 2),
-                        fossil_fuel_energy=round(fossil_fuel_energy, 2),
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow()
-                    )
-                    
-                    records_to_upsert.append(record.model_dump(exclude={"id"}))
+                # Generate realistic energy consumption data based on country size
+                # This is estimated since World Bank doesn't have total energy consumption in TWh
+                total_energy = country_code.map(self._energy_estimate_series).fillna(DEFAULT_ENERGY_ESTIMATE_TWH)
+                renewable_energy = total_energy * renewable_percentage / 100
+                fossil_fuel_energy = total_energy - renewable_energy
+                
+                records = pd.DataFrame({
+                    "country": country_code.map(self.iso3_to_name).fillna(country_code),
+                    "year": year,
+                    "renewable_percentage": renewable_percentage.round(2),
+                    "total_energy_consumption": total_energy.round(2),
+                    "renewable_energy": renewable_energy.round(2),
+                    "fossil_fuel_energy": fossil_fuel_energy.round(2)
+                }).to_dict("records")
+                records_to_upsert = [{**record, "created_at": now, "updated_at": now} for record in records]
                 
                 # Batch upsert records
                 if records_to_upsert:
-                    for record in records_to_upsert:
-                        await energy_collection.update_one(
-                            {"country": record["country"], "year": record["year"]},
-                            {"$set": record},
-                            upsert=True
-                        )
+                    EnergyRecord.model_validate(records_to_upsert[0])
+                    await self._bulk_upsert(energy_collection, records_to_upsert)
                     
                     logger.info(f"Updated {len(records_to_upsert)} real energy records for {year}")
-                
-                # Add delay between years
-                await asyncio.sleep(1)
+            
+            await self._gather_years(target_years, process_year)
                 
         except Exception as e:
             logger.error(f"Error updating energy with real data: {e}")
             raise
 
 
-    def estimate_total_energy_consumption(self, country_code: str) -> float:
-        """Estimate total energy consumption in TWh based on country characteristics"""
-        # Rough estimates based on country size and development level
-        energy_estimates = {
-            "US": 4000, "CN": 7500, "IN": 1200, "RU": 1100, "JP": 1000,
-            "DE": 600, "BR": 600, "CA": 650, "KR": 550, "GB": 350,
-            "IT": 320, "FR": 480, "AU": 260, "ES": 280, "MX": 300,
-            "ID": 250, "TR": 280, "SA": 350, "IR": 280, "TH": 200,
-            "ZA": 230, "PL": 170, "AR": 130, "EG": 180, "NL": 120,
-            "MY": 180, "PK": 120, "VN": 220, "BD": 80, "NG": 30,
-            "PH": 100, "IQ": 90, "VE": 80, "KZ": 100, "DZ": 70,
-            "CL": 80, "MA": 40, "PE": 55, "IL": 65, "NO": 140,
-            "FI": 85, "DK": 35, "SE": 140, "CH": 60, "AT": 75,
-            "BE": 85, "PT": 50, "CZ": 75, "GR": 50, "UA": 120
-        }
-        return energy_estimates.get(country_code, 50)  # Default 50 TWh for unknown countries
+    async def _write_year(self, collection, year: int, records: List[Dict[str, Any]], semaphore: asyncio.Semaphore) -> int:
+        """Upsert one year's records once a write slot is free, returning how many were written"""
+        async with semaphore:
+            await self._bulk_upsert(collection, records)
+            logger.info(f"Upserted {len(records)} OWID records for {year}")
+            return len(records)
+
+    async def _bulk_upsert(self, collection, records: List[Dict[str, Any]]):
+        """Upsert records keyed on (country, year) in a single unordered bulk write"""
+        ops = [
+            UpdateOne(
+                {"country": record["country"], "year": record["year"]},
+                {"$set": record},
+                upsert=True
+            )
+            for record in records
+        ]
+        await collection.bulk_write(ops, ordered=False)
 
     async def seed_real_historical_data(self, db):
         """Seed database with real historical data from Our World in Data and World Bank"""
@@ -368,64 +474,47 @@ class ExternalDataService:
             priority_years = [2023, 2022, 2021, 2020]
             all_years = list(range(2010, 2024))
             
-            # Fetch CO2 data from Our World in Data (more comprehensive)
+            # Stream CO2 data from Our World in Data (more comprehensive)
             logger.info("Fetching CO2 emissions data from Our World in Data...")
-            owid_data = await self.fetch_owid_co2_data(all_years)
-            
-            logger.info(f"OWID data fetched: {len(owid_data)} years, total records: {sum(len(records) for records in owid_data.values())}")
             
-            # Process and insert OWID data
-            records_inserted = 0
-            for year, year_records in owid_data.items():
-                if not year_records:
-                    logger.warning(f"No emission data found for {year}")
-                    continue
-                    
-                logger.info(f"Processing {len(year_records)} CO2 records for {year}")
-                
-                for record_data in year_records:
-                    try:
-                        # Calculate missing values if needed
-                        co2_total = record_data.get('co2_total')  # Already in Mt
-                        co2_per_capita = record_data.get('co2_per_capita')
-                        population = record_data.get('population')
+            # Process and insert OWID data as each chunk is parsed. Each year's
+            # bulk write runs as its own task so it overlaps with parsing and
+            # with the other years' writes, bounded like the World Bank fetches
+            years_with_data = set()
+            write_semaphore = asyncio.Semaphore(self.max_concurrent_years)
+            writes = []
+            try:
+                async with aclosing(self.iter_owid_co2_data(all_years)) as owid_records:
+                    async for year, year_records in owid_records:
+                        years_with_data.add(year)
+                        logger.info(f"Processing {len(year_records)} CO2 records for {year}")
+                        now = datetime.utcnow()
                         
-                        # Skip if no emission data
-                        if not co2_total and not co2_per_capita:
-                            continue
-                            
-                        # Calculate per capita if missing
-                        if not co2_per_capita and co2_total and population:
-                            co2_per_capita = (co2_total * 1000000) / population  # Mt to tonnes
-                            
-                        # Calculate total if missing  
-                        if not co2_total and co2_per_capita and population:
-                            co2_total = (co2_per_capita * population) / 1000000  # tonnes to Mt
-                        
-                        record = EmissionRecord(
-                            country=record_data['country'],
-                            year=record_data['year'],
-                            co2_emissions=round(co2_total, 2) if co2_total else 0.0,
-                            population=population if population else 0,
-                            gdp=round(record_data.get('gdp', 0.0), 2) if record_data.get('gdp') else 0.0,
-                            co2_per_capita=round(co2_per_capita, 2) if co2_per_capita else 0.0,
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow()
-                        )
-                        
-                        record_dict = record.model_dump(exclude={"id"})
-                        record_dict["data_source"] = "our_world_in_data"
-                        
-                        await emissions_collection.update_one(
-                            {"country": record.country, "year": record.year},
-                            {"$set": record_dict},
-                            upsert=True
-                        )
-                        records_inserted += 1
+                        # Rows arrive already filtered and cleaned by _read_owid_chunk
+                        records_to_upsert = [
+                            {**record_data, "created_at": now, "updated_at": now, "data_source": "our_world_in_data"}
+                            for record_data in year_records
+                        ]
                         
-                    except Exception as e:
-                        logger.warning(f"Error processing OWID record for {record_data.get('country', 'unknown')}: {e}")
-                        continue
+                        if records_to_upsert:
+                            # Spot-check the schema on one record rather than validating every row
+                            EmissionRecord.model_validate(records_to_upsert[0])
+                            writes.append(asyncio.create_task(
+                                self._write_year(emissions_collection, year, records_to_upsert, write_semaphore)
+                            ))
+                
+                records_inserted = sum(await asyncio.gather(*writes))
+                
+            finally:
+                # On any failure, don't leave writes running unobserved
+                pending = [write for write in writes if not write.done()]
+                for write in pending:
+                    write.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            
+            for year in all_years:
+                if year not in years_with_data:
+                    logger.warning(f"No emission data found for {year}")
             
             logger.info(f"Inserted {records_inserted} real CO2 emission records from Our World in Data")
             
@@ -2,6 +2,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import asyncio
+import fcntl
 import os
 import logging
 
@@ -15,6 +16,30 @@ logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 data_service = DataService()
 
+# Held open by the one worker process that owns the scheduler
+_scheduler_lock = None
+
+def _acquire_scheduler_lock() -> bool:
+    """Take an exclusive lockfile so only one uvicorn worker runs the scheduler"""
+    global _scheduler_lock
+    lock_path = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/sustainability_scheduler.lock")
+    lock_file = open(lock_path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _scheduler_lock = lock_file
+    return True
+
+def _release_scheduler_lock():
+    """Release the scheduler lockfile if this worker holds it"""
+    global _scheduler_lock
+    if _scheduler_lock:
+        fcntl.flock(_scheduler_lock, fcntl.LOCK_UN)
+        _scheduler_lock.close()
+        _scheduler_lock = None
+
 async def update_sustainability_data():
     """Background job to update sustainability data"""
     try:
@@ -26,8 +51,12 @@ async def update_sustainability_data():
 def start_scheduler():
     """Start the background scheduler"""
     try:
+        if not _acquire_scheduler_lock():
+            logger.info("Scheduler already running in another worker, skipping")
+            return
+        
         # Get interval from environment
-        interval_minutes = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", 1))
+        interval_minutes = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", 1440))
         
         # Add job
         scheduler.add_job(
@@ -35,12 +64,18 @@ def start_scheduler():
             trigger=IntervalTrigger(minutes=interval_minutes),
             id="sustainability_data_update",
             name="Update Sustainability Data",
-            replace_existing=True
+            replace_existing=True,
+            # A refresh can outlast the interval; never run two at once
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600
         )
         
-        # Start scheduler
+        # Start scheduler on the server's running loop (uvloop under uvicorn)
+        loop = asyncio.get_running_loop()
+        scheduler.configure(event_loop=loop)
         scheduler.start()
-        logger.info(f"Scheduler started with {interval_minutes} minute interval")
+        logger.info(f"Scheduler started with {interval_minutes} minute interval on {type(loop).__module__} loop")
         
         # Run initial data update
         asyncio.create_task(update_sustainability_data())
@@ -54,6 +89,7 @@ def stop_scheduler():
         if scheduler.running:
             scheduler.shutdown()
             logger.info("Scheduler stopped")
+        _release_scheduler_lock()
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
 
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Any
+import logging
+
+from pymongo.errors import OperationFailure
+
+from db import CO2_PER_CAPITA_INDEX
+
+logger = logging.getLogger(__name__)
+
+# Singleton document id in the materialized dashboard_stats collection
+DASHBOARD_STATS_ID = "global"
+
+# Year-independent aggregation stage, built once at import. Runs over the
+# emissions and energy documents together: each accumulator skips the
+# documents that lack its field.
+_TOTALS_GROUP_STAGE = {"$group": {
+    "_id": None,
+    "total": {"$sum": "$co2_emissions"},
+    "avg": {"$avg": {"$toDouble": "$renewable_percentage"}}
+}}
+
+_PERFORMERS_PROJECTION = {"country": 1, "co2_per_capita": 1, "_id": 0}
+
+# Metadata document ids holding the distinct emissions field values
+AVAILABLE_VALUES_IDS = {"country": "countries", "year": "years"}
+
+async def _find_performers(collection, query: Dict[str, Any], direction: int) -> List[Dict[str, Any]]:
+    """Find five performers by CO2 per capita, hinting the per-capita index when it exists"""
+    def find(hinted: bool):
+        cursor = collection.find(query, _PERFORMERS_PROJECTION)
+        if hinted:
+            cursor = cursor.hint(CO2_PER_CAPITA_INDEX)
+        return cursor.sort("co2_per_capita", direction).limit(5).to_list(5)
+
+    try:
+        return await find(hinted=True)
+    except OperationFailure as e:
+        # Index builds may fail at startup or still be pending on a secondary
+        logger.warning(f"Per-capita index unavailable, querying performers without hint: {e}")
+        return await find(hinted=False)
+
+async def compute_dashboard_stats(db) -> Dict[str, Any]:
+    """Aggregate the overall dashboard statistics from the raw collections"""
+    emissions_collection = db["emissions"]
+    energy_collection = db["energy"]
+
+    latest_year = 2021
+
+    # Total CO2 emissions and average renewable percentage for latest year in one pass
+    totals_pipeline = [
+        {"$match": {"year": latest_year}},
+        {"$unionWith": {"coll": energy_collection.name, "pipeline": [{"$match": {"year": latest_year}}]}},
+        _TOTALS_GROUP_STAGE
+    ]
+
+    # Top and worst performers by CO2 per capita. A bounded range on the
+    # indexed field also drops the 0.0 placeholders written for missing data.
+    performers_query = {"year": latest_year, "co2_per_capita": {"$gt": 0}}
+
+    # None of these depend on each other, so let motor multiplex them
+    (
+        countries,
+        totals_result,
+        top_performers,
+        worst_performers
+    ) = await asyncio.gather(
+        emissions_collection.distinct("country"),
+        emissions_collection.aggregate(totals_pipeline).to_list(1),
+        _find_performers(emissions_collection, performers_query, 1),
+        _find_performers(emissions_collection, performers_query, -1)
+    )
+
+    totals = totals_result[0] if totals_result else {}
+    total_co2_emissions = totals.get("total") or 0
+    avg_renewable_percentage = totals.get("avg") or 0
+
+    return {
+        "total_countries": len(countries),
+        "latest_year": latest_year,
+        "total_co2_emissions": round(total_co2_emissions, 2),
+        "avg_renewable_percentage": round(avg_renewable_percentage, 2),
+        "top_performers": top_performers,
+        "worst_performers": worst_performers,
+        "last_updated": datetime.utcnow()
+    }
+
+async def refresh_dashboard_stats(db):
+    """Recompute dashboard statistics and store them in the dashboard_stats collection"""
+    try:
+        stats = await compute_dashboard_stats(db)
+        await db["dashboard_stats"].update_one(
+            {"_id": DASHBOARD_STATS_ID},
+            {"$set": {**stats, "computed_at": stats["last_updated"]}},
+            upsert=True
+        )
+        logger.info("Refreshed materialized dashboard stats")
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard stats: {e}")
+
+async def get_available_values(db, field: str) -> List[Any]:
+    """Get the sorted distinct values of an emissions field, preferring the precomputed list"""
+    doc = await db["metadata"].find_one({"_id": AVAILABLE_VALUES_IDS[field]})
+    if doc:
+        return doc["list"]
+    return sorted(await db["emissions"].distinct(field))
+
+async def refresh_available_values(db):
+    """Precompute the distinct emissions countries and years into the metadata collection"""
+    try:
+        for field, doc_id in AVAILABLE_VALUES_IDS.items():
+            values = sorted(await db["emissions"].distinct(field))
+            await db["metadata"].update_one(
+                {"_id": doc_id},
+                {"$set": {"list": values, "computed_at": datetime.utcnow()}},
+                upsert=True
+            )
+        logger.info("Refreshed available countries and years")
+    except Exception as e:
+        logger.error(f"Error refreshing available countries and years: {e}")